@@ -1,4 +1,123 @@
 import json
+import mmap
+import os
+import sys
+from bisect import bisect_right
+from collections import Counter
+from operator import itemgetter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def _require_msgpack():
+    """
+    Проверяет, что пакет msgpack установлен.
+    Raises:
+        ImportError: Если msgpack недоступен.
+    """
+    if msgpack is None:
+        raise ImportError("Для хранения библиотеки в формате .msgpack установите пакет msgpack.")
+
+
+def _dumps(data, binary=False):
+    """
+    Сериализует данные в JSON (байты UTF-8) или в MessagePack.
+    Для JSON использует orjson, если он установлен, иначе стандартный модуль json.
+    Args:
+        data (list): Данные для сериализации.
+        binary (bool): Сохранять в формате MessagePack. По умолчанию False.
+    Returns:
+        bytes: Сериализованные данные.
+    """
+    if binary:
+        _require_msgpack()
+        return msgpack.packb(data, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _loads(raw, binary=False):
+    """
+    Десериализует данные из байтов JSON или MessagePack.
+    Если данные не являются корректным MessagePack, они читаются как JSON,
+    что позволяет один раз перенести старый JSON-файл в новый формат.
+    Ошибки разбора, в том числе некорректная кодировка, приводятся к json.JSONDecodeError.
+    Args:
+        raw (bytes | memoryview): Сериализованные данные.
+        binary (bool): Ожидать формат MessagePack. По умолчанию False.
+    Returns:
+        list: Десериализованные данные.
+    Raises:
+        json.JSONDecodeError: Если данные не удалось разобрать.
+    """
+    if binary:
+        _require_msgpack()
+        try:
+            return msgpack.unpackb(raw, raw=False)
+        except (ValueError, msgpack.exceptions.UnpackException):
+            pass
+    if orjson is not None:
+        return orjson.loads(raw)
+    try:
+        return json.loads(bytes(raw))
+    except UnicodeDecodeError as error:
+        raise json.JSONDecodeError(f"Некорректная кодировка данных: {error.reason}", "", 0) from error
+
+
+def _read_file(path, binary=False):
+    """
+    Читает и десериализует файл библиотеки.
+    Файл отображается в память через mmap и разбирается напрямую из отображения,
+    без промежуточной копии содержимого в буфер чтения.
+    Args:
+        path (str): Путь к файлу.
+        binary (bool): Ожидать формат MessagePack. По умолчанию False.
+    Returns:
+        list: Десериализованные данные.
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return _loads(b"", binary)
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+            return _loads(view, binary)
+
+
+MENU = (
+    "\nМеню:\n"
+    "1. Добавить книгу\n"
+    "2. Удалить книгу\n"
+    "3. Найти книгу\n"
+    "4. Показать все книги\n"
+    "5. Изменить статус книги\n"
+    "6. Выйти\n"
+    "Выберите действие: "
+)
+
+SEARCH_MENU = (
+    "\nМеню поиска:\n"
+    "1. Поиск по автору\n"
+    "2. Поиск по названию\n"
+    "3. Поиск по году\n"
+    "Выберите критерий поиска: "
+)
+
+_SEARCH_FIELDS = {"author": "_author_lc", "title": "_title_lc", "year": "_year_str"}
+
+_BOOK_FIELDS = itemgetter("id", "title", "author", "year", "status")
+
+_YEAR_MIN, _YEAR_MAX = 0, 2024
+
+_HAYSTACK_MIN_BOOKS = 1000
+_HAYSTACK_SEPARATOR = "\x00"
 
 
 class Book:
@@ -11,9 +130,12 @@ class Book:
             year (int): Год издания книги.
             status (str): Статус книги ("в наличии" или "выдана").
         """
+    __slots__ = ("id", "title", "author", "year", "status", "_title_lc", "_author_lc", "_year_str")
+
     def __init__(self, book_id, title, author, year, status="в наличии"):
         """
         Инициализирует объект книги.
+        Заранее вычисляет значения полей для поиска без учета регистра.
         Args:
             book_id (int): Уникальный идентификатор книги.
             title (str): Название книги.
@@ -26,6 +148,9 @@ class Book:
         self.author = author
         self.year = year
         self.status = status
+        self._title_lc = title.lower()
+        self._author_lc = author.lower()
+        self._year_str = str(year)
 
     def to_dict(self):
         """
@@ -41,6 +166,14 @@ class Book:
             "status": self.status
         }
 
+    def __str__(self):
+        """
+        Возвращает строковое представление книги для вывода.
+        Returns:
+            str: Строка с id, названием, автором, годом и статусом книги.
+        """
+        return f"{self.id}: {self.title} by {self.author}, {self.year} ({self.status})"
+
     @staticmethod
     def from_dict(data):
         """
@@ -50,7 +183,40 @@ class Book:
         Returns:
             Book: Объект книги.
         """
-        return Book(data["id"], data["title"], data["author"], data["year"], data["status"])
+        return Book(*_BOOK_FIELDS(data))
+
+
+def _validate_book(title, author, year):
+    """
+    Проверяет данные новой книги за один проход.
+    Args:
+        title (str): Название книги.
+        author (str): Автор книги.
+        year (str): Год издания книги.
+    Returns:
+        tuple: (ok, error, year), где ok - корректны ли данные, error - сообщение об ошибке или None,
+            year - год, приведенный к int (или исходное значение при ошибке).
+    """
+    if not title.strip():
+        return False, "Ошибка: название книги не может быть пустым.", year
+    if not author.strip():
+        return False, "Ошибка: автор книги не может быть пустым.", year
+    try:
+        year = int(year)
+    except ValueError:
+        return False, "Ошибка: год должен быть числом.", year
+    if not _YEAR_MIN <= year <= _YEAR_MAX:
+        return False, "Ошибка: год должен быть положительным и не превышать текущий.", year
+    return True, None, year
+
+
+def _print_books(books):
+    """
+    Выводит список книг, по одной на строку, одной операцией записи.
+    Args:
+        books (list): Список объектов книг.
+    """
+    sys.stdout.write("\n".join(map(str, books)) + "\n")
 
 
 class Library:
@@ -58,29 +224,59 @@ class Library:
     Класс для управления библиотекой книг.
     Атрибуты:
         storage_file (str): Имя файла для хранения данных о книгах.
+        binary (bool): Хранятся ли данные в формате MessagePack (файл с расширением .msgpack).
+        autocommit (bool): Сохранять ли изменения в файл сразу после каждой операции.
         books (list): Список объектов книг.
     """
-    def __init__(self, storage_file="library.json"):
+    def __init__(self, storage_file="library.json", autocommit=True):
         """
         Инициализирует объект библиотеки и загружает данные из файла.
         Args:
             storage_file (str): Имя файла для хранения данных. По умолчанию "library.json".
+                Файлы с расширением .msgpack хранятся в формате MessagePack.
+            autocommit (bool): Сохранять изменения сразу после каждой операции. По умолчанию True.
+                Если False, изменения записываются в файл только при вызове flush().
         """
         self.storage_file = storage_file
+        self.binary = storage_file.endswith(".msgpack")
+        self.autocommit = autocommit
+        self._dirty = False
         self.books = []
         self.load_books()
 
+    @property
+    def books(self):
+        """
+        list: Список объектов книг.
+        """
+        return self._books
+
+    @books.setter
+    def books(self, books):
+        """
+        Заменяет список книг и перестраивает индексы по id и по (название, автор, год), а также счетчик id.
+        Сбрасывает отпечаток последнего сохранения, поэтому после загрузки или замены книг
+        следующее сохранение всегда записывает файл.
+        Args:
+            books (list): Новый список объектов книг.
+        """
+        self._books = books
+        self._by_id = {book.id: book for book in books}
+        self._dup_keys = Counter((book.title, book.author, book.year) for book in books)
+        self._haystacks = {}
+        self._last_hash = None
+        self._next_id = max(self._by_id, default=0) + 1
+
     def load_books(self):
         """
-        Загружает книги из файла JSON.
+        Загружает книги из файла JSON или MessagePack.
 
         Если файл не найден, создает пустую библиотеку.
         Если файл поврежден, предлагает восстановить или завершить выполнение программы.
         """
         try:
-            with open(self.storage_file, "r", encoding="utf-8") as file:
-                data = json.load(file)
-                self.books = [Book.from_dict(book) for book in data]
+            data = _read_file(self.storage_file, self.binary)
+            self.books = list(map(Book.from_dict, data))
         except FileNotFoundError:
             self.books = []
         except json.JSONDecodeError:
@@ -93,10 +289,50 @@ class Library:
 
     def save_books(self):
         """
-        Сохраняет данные о книгах в файл JSON.
+        Сохраняет данные о книгах в файл JSON или MessagePack.
+
+        Данные сериализуются целиком и записываются одним вызовом во временный файл,
+        который затем атомарно заменяет основной, чтобы сбой во время записи не повредил библиотеку.
+        При ошибке записи временный файл удаляется, а основной остается без изменений.
+        Если с последнего сохранения не изменились ни содержимое библиотеки, ни файл хранения,
+        и файл хранения существует, запись пропускается.
+        """
+        content_hash = hash((
+            self.storage_file,
+            tuple((book.id, book.title, book.author, book.year, book.status) for book in self.books),
+        ))
+        if content_hash == self._last_hash and os.path.exists(self.storage_file):
+            return
+        data = _dumps([book.to_dict() for book in self.books], self.binary)
+        tmp_file = self.storage_file + ".tmp"
+        try:
+            with open(tmp_file, "wb") as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_file, self.storage_file)
+        except BaseException:
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+            raise
+        self._last_hash = content_hash
+
+    def flush(self):
+        """
+        Сохраняет накопленные изменения в файл, если они есть.
         """
-        with open(self.storage_file, "w", encoding="utf-8") as file:
-            json.dump([book.to_dict() for book in self.books], file, ensure_ascii=False, indent=4)
+        if self._dirty:
+            self.save_books()
+            self._dirty = False
+
+    def _maybe_flush(self):
+        """
+        Сохраняет изменения в файл, если включено автосохранение.
+        """
+        if self.autocommit:
+            self.flush()
 
     def add_book(self, title, author, year):
         """
@@ -107,30 +343,25 @@ class Library:
             author (str): Автор книги.
             year (str): Год издания книги.
         """
-        if not title.strip():
-            print("Ошибка: название книги не может быть пустым.")
-            return
-        if not author.strip():
-            print("Ошибка: автор книги не может быть пустым.")
-            return
-        try:
-            year = int(year)
-            if year < 0 or year > 2024:
-                print("Ошибка: год должен быть положительным и не превышать текущий.")
-                return
-        except ValueError:
-            print("Ошибка: год должен быть числом.")
+        ok, error, year = _validate_book(title, author, year)
+        if not ok:
+            print(error)
             return
 
-        for book in self.books:
-            if book.title == title and book.author == author and book.year == year:
-                print("Ошибка: такая книга уже существует в библиотеке.")
-                return
+        key = (title, author, year)
+        if key in self._dup_keys:
+            print("Ошибка: такая книга уже существует в библиотеке.")
+            return
 
-        new_id = max([book.id for book in self.books], default=0) + 1
+        new_id = self._next_id
+        self._next_id += 1
         new_book = Book(new_id, title, author, year)
         self.books.append(new_book)
-        self.save_books()
+        self._by_id[new_id] = new_book
+        self._dup_keys[key] += 1
+        self._haystacks.clear()
+        self._dirty = True
+        self._maybe_flush()
         print(f"Книга добавлена с id {new_id}.")
 
     def remove_book(self, book_id):
@@ -158,7 +389,14 @@ class Library:
                 print("Удаление отменено.")
                 return
             self.books.remove(book)
-            self.save_books()
+            del self._by_id[book_id]
+            key = (book.title, book.author, book.year)
+            self._dup_keys[key] -= 1
+            if not self._dup_keys[key]:
+                del self._dup_keys[key]
+            self._haystacks.clear()
+            self._dirty = True
+            self._maybe_flush()
             print(f"Книга с id {book_id} удалена.")
         else:
             print("Книга с таким id не найдена.")
@@ -171,18 +409,56 @@ class Library:
         Returns:
             Book: Найденная книга или None.
         """
-        return next((book for book in self.books if book.id == book_id), None)
+        return self._by_id.get(book_id)
 
     def search_books(self, key, value):
         """
         Выполняет поиск книг по указанному ключу и значению.
         Args:
-            key (str): Поле для поиска (например, "author", "title", "year").
+            key (str): Поле для поиска: "author", "title" или "year".
             value (str): Значение для поиска.
         Returns:
-            list: Список найденных книг.
+            list: Список найденных книг. Для неизвестного поля возвращается пустой список.
+        """
+        attr = _SEARCH_FIELDS.get(key)
+        if attr is None:
+            return []
+        value = value.lower()
+        if len(self.books) < _HAYSTACK_MIN_BOOKS or _HAYSTACK_SEPARATOR in value:
+            return [book for book in self.books if value in getattr(book, attr)]
+
+        haystack, offsets = self._get_haystack(attr)
+        found_books = []
+        pos = haystack.find(value)
+        while pos != -1:
+            index = bisect_right(offsets, pos) - 1
+            found_books.append(self.books[index])
+            if index + 1 == len(offsets):
+                break
+            pos = haystack.find(value, offsets[index + 1])
+        return found_books
+
+    def _get_haystack(self, attr):
+        """
+        Возвращает строку из значений поля всех книг, разделенных символом _HAYSTACK_SEPARATOR,
+        и смещения начала каждого значения. Результат кэшируется до изменения списка книг.
+        Поиск подстроки по одной такой строке выполняется в C и быстрее цикла по книгам
+        для больших библиотек.
+        Args:
+            attr (str): Имя атрибута книги с подготовленным для поиска значением.
+        Returns:
+            tuple: Строка для поиска и список смещений начала значений.
         """
-        return [book for book in self.books if value.lower() in str(getattr(book, key, "")).lower()]
+        cached = self._haystacks.get(attr)
+        if cached is None:
+            values = [getattr(book, attr) for book in self.books]
+            offsets = []
+            pos = 0
+            for field in values:
+                offsets.append(pos)
+                pos += len(field) + 1
+            cached = self._haystacks[attr] = (_HAYSTACK_SEPARATOR.join(values), offsets)
+        return cached
 
     def display_books(self):
         """
@@ -191,8 +467,7 @@ class Library:
         if not self.books:
             print("Библиотека пуста.")
         else:
-            for book in self.books:
-                print(f"{book.id}: {book.title} by {book.author}, {book.year} ({book.status})")
+            _print_books(self.books)
 
     def change_status(self, book_id, new_status):
         """
@@ -220,83 +495,125 @@ class Library:
 
         book = self.find_book_by_id(book_id)
         if book:
+            if book.status == new_status:
+                print("Статус уже установлен.")
+                return
             book.status = new_status
-            self.save_books()
+            self._dirty = True
+            self._maybe_flush()
             print(f"Статус книги с id {book_id} изменён на '{new_status}'.")
         else:
             print("Книга с таким id не найдена.")
 
 
-def main():
+def _handle_add(library):
     """
-    Главная функция программы для управления библиотекой.
-    Реализует меню с выбором действий: добавление, удаление, поиск, просмотр всех книг и изменение статуса.
+    Запрашивает данные новой книги и добавляет её в библиотеку.
+    Args:
+        library (Library): Библиотека.
     """
-    library = Library()
+    title = input("Введите название книги: ")
+    author = input("Введите автора книги: ")
+    year = input("Введите год издания книги: ")
+    library.add_book(title, author, year)
 
-    while True:
-        print("\nМеню:")
-        print("1. Добавить книгу")
-        print("2. Удалить книгу")
-        print("3. Найти книгу")
-        print("4. Показать все книги")
-        print("5. Изменить статус книги")
-        print("6. Выйти")
-        choice = input("Выберите действие: ")
-
-        if choice == "1":
-            title = input("Введите название книги: ")
-            author = input("Введите автора книги: ")
-            year = input("Введите год издания книги: ")
-            library.add_book(title, author, year)
-
-        elif choice == "2":
-            book_id = input("Введите id книги для удаления: ")
-            library.remove_book(book_id)
-
-        elif choice == "3":
-            if not library.books:
-                print("Библиотека пуста. Поиск невозможен.")
-                continue
-            print("\nМеню поиска:")
-            print("1. Поиск по автору")
-            print("2. Поиск по названию")
-            print("3. Поиск по году")
-            search_choice = input("Выберите критерий поиска: ")
-
-            if search_choice == "1":
-                author = input("Введите имя автора: ")
-                found_books = library.search_books("author", author)
-            elif search_choice == "2":
-                title = input("Введите название книги: ")
-                found_books = library.search_books("title", title)
-            elif search_choice == "3":
-                year = input("Введите год издания: ")
-                found_books = library.search_books("year", year)
-            else:
-                print("Ошибка: Некорректный выбор.")
-                continue
 
-            if found_books:
-                for book in found_books:
-                    print(f"{book.id}: {book.title} by {book.author}, {book.year} ({book.status})")
-            else:
-                print("Книги не найдены.")
+def _handle_remove(library):
+    """
+    Запрашивает id книги и удаляет её из библиотеки.
+    Args:
+        library (Library): Библиотека.
+    """
+    book_id = input("Введите id книги для удаления: ")
+    library.remove_book(book_id)
+
 
-        elif choice == "4":
-            library.display_books()
+def _handle_search(library):
+    """
+    Запрашивает критерий и значение поиска и выводит найденные книги.
+    Args:
+        library (Library): Библиотека.
+    """
+    if not library.books:
+        print("Библиотека пуста. Поиск невозможен.")
+        return
+    search_choice = input(SEARCH_MENU)
+    criterion = SEARCH_CRITERIA.get(search_choice)
+    if criterion is None:
+        print("Ошибка: Некорректный выбор.")
+        return
+    key, prompt = criterion
+    found_books = library.search_books(key, input(prompt))
+    if found_books:
+        _print_books(found_books)
+    else:
+        print("Книги не найдены.")
+
+
+def _handle_display(library):
+    """
+    Выводит все книги библиотеки.
+    Args:
+        library (Library): Библиотека.
+    """
+    library.display_books()
 
-        elif choice == "5":
-            book_id = input("Введите id книги: ")
-            new_status = input("Введите новый статус ('в наличии' или 'выдана'): ")
-            library.change_status(book_id, new_status)
 
-        elif choice == "6":
-            print("Выход из программы.")
-            break
+def _handle_change_status(library):
+    """
+    Запрашивает id книги и новый статус и изменяет статус книги.
+    Args:
+        library (Library): Библиотека.
+    """
+    book_id = input("Введите id книги: ")
+    new_status = input("Введите новый статус ('в наличии' или 'выдана'): ")
+    library.change_status(book_id, new_status)
 
-        else:
+
+def _handle_exit(library):
+    """
+    Сохраняет несохраненные изменения и завершает работу программы.
+    Args:
+        library (Library): Библиотека.
+    Returns:
+        bool: False, чтобы завершить главный цикл.
+    """
+    library.flush()
+    print("Выход из программы.")
+    return False
+
+
+SEARCH_CRITERIA = {
+    "1": ("author", "Введите имя автора: "),
+    "2": ("title", "Введите название книги: "),
+    "3": ("year", "Введите год издания: "),
+}
+
+HANDLERS = {
+    "1": _handle_add,
+    "2": _handle_remove,
+    "3": _handle_search,
+    "4": _handle_display,
+    "5": _handle_change_status,
+    "6": _handle_exit,
+}
+
+
+def main():
+    """
+    Главная функция программы для управления библиотекой.
+    Реализует меню с выбором действий: добавление, удаление, поиск, просмотр всех книг и изменение статуса.
+    Выбранный пункт меню передается обработчику из таблицы HANDLERS.
+    """
+    library = Library()
+
+    while True:
+        handler = HANDLERS.get(input(MENU))
+        if handler is None:
             print("Ошибка: Некорректный выбор. Попробуйте снова.")
+            continue
+        if handler(library) is False:
+            break
 
 
 if __name__ == "__main__":
@@ -1,5 +1,9 @@
+import io
+import os
 import unittest
-from main import Book, Library
+from contextlib import nullcontext, redirect_stdout
+from unittest.mock import patch
+from main import Book, Library, msgpack
 
 
 class TestLibrary(unittest.TestCase):
@@ -28,12 +32,90 @@ class TestLibrary(unittest.TestCase):
         self.library.remove_book(book_id)
         self.assertEqual(len(self.library.books), 0)
 
+    def test_add_book_generates_sequential_ids(self):
+        """Тест автогенерации id при добавлении нескольких книг."""
+        self.library.add_book("Book One", "Author Name", "2020")
+        self.library.add_book("Book Two", "Author Name", "2021")
+        first, second = self.library.books
+        self.assertEqual(second.id, first.id + 1)
+
     def test_remove_non_existent_book(self):
         """Тест попытки удалить несуществующую книгу."""
         self.library.add_book("Book Title", "Author Name", "2020")
         self.library.remove_book(9999)  # неверный ID
         self.assertEqual(len(self.library.books), 1)  # Книга не должна быть удалена
 
+    def test_change_status_to_same_value(self):
+        """Тест изменения статуса на уже установленный: файл не перезаписывается."""
+        self.library.add_book("Book Title", "Author Name", "2020")
+        book_id = self.library.books[0].id
+        mtime = os.stat("test_library.json").st_mtime_ns
+        os.utime("test_library.json", ns=(mtime - 10**9, mtime - 10**9))
+        self.library.change_status(book_id, "в наличии")
+        self.assertEqual(os.stat("test_library.json").st_mtime_ns, mtime - 10**9)
+
+    def test_save_books_skips_unchanged_content(self):
+        """Тест пропуска повторного сохранения неизменённой библиотеки."""
+        self.library.add_book("Book Title", "Author Name", "2020")
+        mtime = os.stat("test_library.json").st_mtime_ns
+        os.utime("test_library.json", ns=(mtime - 10**9, mtime - 10**9))
+        self.library.save_books()
+        self.assertEqual(os.stat("test_library.json").st_mtime_ns, mtime - 10**9)
+
+    def test_save_books_recreates_deleted_file(self):
+        """Тест сохранения неизменённой библиотеки, файл которой был удалён извне."""
+        self.library.add_book("Book Title", "Author Name", "2020")
+        os.remove("test_library.json")
+        self.library.save_books()
+        self.assertEqual(len(Library("test_library.json").books), 1)
+
+    def test_save_books_to_new_storage_file(self):
+        """Тест сохранения неизменённой библиотеки в другой файл."""
+        self.library.add_book("Book Title", "Author Name", "2020")
+        self.addCleanup(os.remove, "test_library_other.json")
+        self.library.storage_file = "test_library_other.json"
+        self.library.save_books()
+        self.assertEqual(len(Library("test_library_other.json").books), 1)
+
+    def test_save_books_after_reload(self):
+        """Тест сохранения после загрузки данных, изменённых вне библиотеки."""
+        self.library.add_book("Book Title", "Author Name", "2020")
+        other = Library("test_library.json")
+        other.change_status(other.books[0].id, "выдана")
+        self.library.load_books()
+        self.library.books[0].status = "в наличии"
+        self.library.save_books()
+        self.assertEqual(Library("test_library.json").books[0].status, "в наличии")
+
+    def test_save_books_replaces_file_atomically(self):
+        """Тест сохранения через временный файл, который не остается после записи."""
+        self.library.add_book("Book Title", "Author Name", "2020")
+        self.assertFalse(os.path.exists("test_library.json.tmp"))
+        reloaded = Library("test_library.json")
+        self.assertEqual([book.title for book in reloaded.books], ["Book Title"])
+
+    def test_save_books_failure_keeps_original_file(self):
+        """Тест ошибки записи: временный файл удаляется, основной файл не меняется."""
+        self.library.add_book("Book Title", "Author Name", "2020")
+        with open("test_library.json", "rb") as file:
+            original = file.read()
+        self.library.books[0].status = "выдана"
+        with patch("main.os.fsync", side_effect=OSError("No space left on device")):
+            with self.assertRaises(OSError):
+                self.library.save_books()
+        self.assertFalse(os.path.exists("test_library.json.tmp"))
+        with open("test_library.json", "rb") as file:
+            self.assertEqual(file.read(), original)
+
+    def test_find_book_by_id(self):
+        """Тест поиска книги по id."""
+        self.library.add_book("Book Title", "Author Name", "2020")
+        book = self.library.books[0]
+        self.assertIs(self.library.find_book_by_id(book.id), book)
+        with patch("builtins.input", return_value="да"):
+            self.library.remove_book(book.id)
+        self.assertIsNone(self.library.find_book_by_id(book.id))
+
     def test_change_status(self):
         """Тест изменения статуса книги."""
         self.library.add_book("Book Title", "Author Name", "2020")
@@ -62,6 +144,27 @@ class TestLibrary(unittest.TestCase):
         self.assertEqual(len(found_books), 1)
         self.assertEqual(found_books[0].year, 2020)
 
+    def test_search_books_case_insensitive(self):
+        """Тест поиска книги без учета регистра."""
+        self.library.add_book("Война и мир", "Лев Толстой", "1869")
+        found_books = self.library.search_books("title", "ВОЙНА")
+        self.assertEqual(len(found_books), 1)
+        self.assertEqual(found_books[0].title, "Война и мир")
+
+    def test_search_books_large_library(self):
+        """Тест поиска в большой библиотеке."""
+        self.library.books = [Book(i, f"Title {i}", f"Author {i % 7}", 1900 + i % 100) for i in range(1, 1501)]
+        for key, value in [("title", "title 1"), ("author", "OR 3"), ("year", "195"), ("title", "")]:
+            expected = [book for book in self.library.books if value.lower() in str(getattr(book, key)).lower()]
+            self.assertEqual(self.library.search_books(key, value), expected)
+        self.library.add_book("Новая книга", "Author 3", "2000")
+        self.assertEqual(self.library.search_books("title", "новая"), [self.library.books[-1]])
+
+    def test_search_books_unknown_key(self):
+        """Тест поиска по неизвестному полю."""
+        self.library.add_book("Book Title", "Author Name", "2020")
+        self.assertEqual(self.library.search_books("publisher", ""), [])
+
     def test_invalid_status_change(self):
         """Тест попытки изменить статус на некорректное значение."""
         self.library.add_book("Book Title", "Author Name", "2020")
@@ -74,17 +177,120 @@ class TestLibrary(unittest.TestCase):
         self.assertEqual(len(self.library.books), 0)
         self.library.display_books()  # Проверяем, что выводится сообщение "Библиотека пуста."
 
+    def test_display_books(self):
+        """Тест вывода списка всех книг."""
+        self.library.add_book("Book One", "Author Name", "2020")
+        self.library.add_book("Book Two", "Author Name", "2021")
+        first, second = self.library.books
+        with redirect_stdout(io.StringIO()) as output:
+            self.library.display_books()
+        self.assertEqual(output.getvalue(), f"{first}\n{second}\n")
+        self.assertEqual(str(first), f"{first.id}: Book One by Author Name, 2020 (в наличии)")
+
     def test_invalid_year_in_add_book(self):
         """Тест добавления книги с некорректным годом."""
         self.library.add_book("Book Title", "Author Name", "invalid_year")
         self.assertEqual(len(self.library.books), 0)  # Книга не должна быть добавлена
 
+    def test_invalid_fields_in_add_book(self):
+        """Тест добавления книги с пустыми полями или годом вне допустимого диапазона."""
+        self.library.add_book("   ", "Author Name", "2020")
+        self.library.add_book("Book Title", "", "2020")
+        self.library.add_book("Book Title", "Author Name", "-1")
+        self.library.add_book("Book Title", "Author Name", "3000")
+        self.assertEqual(len(self.library.books), 0)  # Книги не должны быть добавлены
+
     def test_duplicate_book(self):
         """Тест добавления одинаковых книг."""
         self.library.add_book("Book Title", "Author Name", "2020")
         self.library.add_book("Book Title", "Author Name", "2020")
         self.assertEqual(len(self.library.books), 1)  # Книга не должна быть добавлена повторно
 
+    def test_deferred_save_with_flush(self):
+        """Тест отложенного сохранения изменений до вызова flush."""
+        library = Library("test_library_deferred.json", autocommit=False)
+        self.addCleanup(os.remove, "test_library_deferred.json")
+        library.books = []
+        library.add_book("Book One", "Author Name", "2020")
+        library.add_book("Book Two", "Author Name", "2021")
+        self.assertFalse(os.path.exists("test_library_deferred.json"))
+        library.flush()
+        self.assertEqual(len(Library("test_library_deferred.json").books), 2)
+
+    def test_add_book_after_removing_duplicate(self):
+        """Тест повторного добавления книги после её удаления."""
+        self.library.add_book("Book Title", "Author Name", "2020")
+        with patch("builtins.input", return_value="да"):
+            self.library.remove_book(self.library.books[0].id)
+        self.library.add_book("Book Title", "Author Name", "2020")
+        self.assertEqual(len(self.library.books), 1)
+
+    def test_duplicate_check_after_removing_one_of_loaded_copies(self):
+        """Тест: после удаления одной из загруженных копий книги её нельзя добавить снова."""
+        self.library.books = [Book(1, "Book Title", "Author Name", 2020), Book(2, "Book Title", "Author Name", 2020)]
+        with patch("builtins.input", return_value="да"):
+            self.library.remove_book(1)
+        self.library.add_book("Book Title", "Author Name", "2020")
+        self.assertEqual([book.id for book in self.library.books], [2])
+
+    @unittest.skipUnless(msgpack, "msgpack не установлен")
+    def test_msgpack_storage_roundtrip(self):
+        """Тест сохранения и загрузки библиотеки в формате MessagePack."""
+        library = Library("test_library.msgpack")
+        self.addCleanup(os.remove, "test_library.msgpack")
+        library.books = []
+        library.add_book("Книга", "Автор", "2020")
+        reloaded = Library("test_library.msgpack")
+        self.assertEqual(len(reloaded.books), 1)
+        self.assertEqual(reloaded.books[0].title, "Книга")
+
+    def _load_from_bytes(self, path, raw):
+        """Записывает байты в файл и загружает из него библиотеку, соглашаясь на восстановление."""
+        with open(path, "wb") as file:
+            file.write(raw)
+        with patch("builtins.input", return_value="да"):
+            return Library(path)
+
+    def test_load_invalid_utf8_without_orjson(self):
+        """Тест восстановления файла с некорректной кодировкой без orjson."""
+        self.addCleanup(os.remove, "test_library_bad.json")
+        with patch("main.orjson", None):
+            library = self._load_from_bytes("test_library_bad.json", b"\x91\xc1\xff")
+        self.assertEqual(library.books, [])
+
+    def test_load_empty_or_truncated_json_file(self):
+        """Тест восстановления пустого или обрезанного JSON-файла."""
+        self.addCleanup(os.remove, "test_library_bad.json")
+        for raw in (b"", b'[{"id": 1, "title": "Book'):
+            for json_backend in (nullcontext(), patch("main.orjson", None)):
+                with self.subTest(raw=raw), json_backend:
+                    library = self._load_from_bytes("test_library_bad.json", raw)
+                    self.assertEqual(library.books, [])
+
+    @unittest.skipUnless(msgpack, "msgpack не установлен")
+    def test_msgpack_corrupted_file(self):
+        """Тест восстановления поврежденного, обрезанного или пустого файла MessagePack."""
+        self.addCleanup(os.remove, "test_library_bad.msgpack")
+        book = {"id": 1, "title": "Книга", "author": "Автор", "year": 2020, "status": "в наличии"}
+        truncated = msgpack.packb([book])[:-5]
+        for raw in (b"\xc1\xff\x00\x91", truncated, b""):
+            for json_backend in (nullcontext(), patch("main.orjson", None)):
+                with self.subTest(raw=raw), json_backend:
+                    library = self._load_from_bytes("test_library_bad.msgpack", raw)
+                    self.assertEqual(library.books, [])
+
+    @unittest.skipUnless(msgpack, "msgpack не установлен")
+    def test_msgpack_migrates_json_file(self):
+        """Тест переноса JSON-файла в формат MessagePack."""
+        self.addCleanup(os.remove, "test_library_migrated.msgpack")
+        self.library.add_book("Книга", "Автор", "2020")
+        with open("test_library.json", "rb") as file:
+            library = self._load_from_bytes("test_library_migrated.msgpack", file.read())
+        self.assertEqual([book.title for book in library.books], ["Книга"])
+        library.change_status(library.books[0].id, "выдана")
+        with open("test_library_migrated.msgpack", "rb") as file:
+            self.assertEqual(msgpack.unpackb(file.read())[0]["status"], "выдана")
+
 
 if __name__ == "__main__":
     unittest.main()